@@ -1,24 +1,134 @@
 """
 Admin configuration for authentication app.
 """
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.utils import display_for_value, label_for_field, lookup_field
+from django.contrib.auth.models import User
+from django.db.models import Q, prefetch_related_objects
+from django.http import QueryDict
+from django.template.response import TemplateResponse
 from django.utils.html import format_html
-from django.urls import reverse
+from django.urls import path, reverse
 from django.utils.safestring import mark_safe
-from .models import OTPLog, LoginAttempt
+from .models import OTPLog, LoginAttempt, SecuritySummary, TrustedDevice
+from .sharding import get_shards, scatter_gather
+
+
+class ShardListFilter(admin.SimpleListFilter):
+    """List filter that picks which shard the changelist reads from."""
+    title = 'shard'
+    parameter_name = 'shard'
+    
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in get_shards()]
+    
+    def queryset(self, request, queryset):
+        # The shard is applied in ShardedAdminMixin.get_queryset
+        return queryset
+    
+    def choices(self, changelist):
+        selected = self.value() or get_shards()[0]
+        for alias, title in self.lookup_choices:
+            yield {
+                'selected': selected == alias,
+                'query_string': changelist.get_query_string({self.parameter_name: alias}),
+                'display': title,
+            }
+        yield {
+            'selected': False,
+            'query_string': 'all-shards/',
+            'display': f'All shards (latest {ShardedAdminMixin.all_shards_limit})',
+        }
+
+
+class ShardedAdminMixin:
+    """
+    Admin support for models sharded by user.
+    
+    The changelist and change views read from one shard at a time (chosen by
+    the shard filter); the all-shards view merges the latest rows of every
+    shard. Users live on 'default', so they are prefetched rather than joined
+    and user searches are resolved to ids first.
+    """
+    all_shards_limit = 100
+    # Most users a search term is resolved to before querying the shard
+    search_user_limit = 1000
+    # Never join auth_user, which only exists on 'default'
+    list_select_related = ()
+    
+    def get_shard(self, request):
+        shard = request.GET.get('shard') or QueryDict(request.GET.get('_changelist_filters', '')).get('shard')
+        return shard if shard in get_shards() else get_shards()[0]
+    
+    def get_list_filter(self, request):
+        return [ShardListFilter, *super().get_list_filter(request)]
+    
+    def get_queryset(self, request):
+        """Read from the selected shard and prefetch users from 'default'."""
+        return super().get_queryset(request).using(self.get_shard(request)).prefetch_related('user')
+    
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        user_ids = list(User.objects.filter(
+            Q(username__icontains=search_term) | Q(email__icontains=search_term)
+        ).order_by('pk').values_list('pk', flat=True)[:self.search_user_limit + 1])
+        if len(user_ids) > self.search_user_limit:
+            user_ids = user_ids[:self.search_user_limit]
+            self.message_user(
+                request,
+                f"The search matched more than {self.search_user_limit} users; only rows of the first "
+                f"{self.search_user_limit} (by id) are shown. Use a more specific search term.",
+                messages.WARNING,
+            )
+        query = Q(user_id__in=user_ids)
+        for field in self.search_fields:
+            if not field.startswith('user__'):
+                query |= Q(**{f'{field}__icontains': search_term})
+        return queryset.filter(query), False
+    
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path('all-shards/', self.admin_site.admin_view(self.all_shards_view),
+                 name=f'{opts.app_label}_{opts.model_name}_all_shards'),
+        ] + super().get_urls()
+    
+    def all_shards_view(self, request):
+        """List the latest rows across all shards with a scatter-gather merge."""
+        objects = scatter_gather(self.model._base_manager.all(), self.all_shards_limit)
+        prefetch_related_objects(objects, 'user')
+        
+        list_display = [name for name in self.get_list_display(request) if name != 'action_checkbox']
+        headers = [label_for_field(name, self.model, self) for name in list_display]
+        rows = []
+        for obj in objects:
+            values = []
+            for name in list_display:
+                _, _, value = lookup_field(name, obj, self)
+                values.append(display_for_value(value, '-'))
+            rows.append({'shard': obj._state.db, 'values': values})
+        
+        return TemplateResponse(request, 'admin/authentication/all_shards.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f'Latest {self.model._meta.verbose_name_plural} across all shards',
+            'headers': headers,
+            'rows': rows,
+        })
 
 
 @admin.register(OTPLog)
-class OTPLogAdmin(admin.ModelAdmin):
-    list_display = ['user', 'otp_code', 'created_at', 'expires_at', 'is_used', 'is_verified', 'is_expired_display']
+class OTPLogAdmin(ShardedAdminMixin, admin.ModelAdmin):
+    list_display = ['user', 'created_at', 'expires_at', 'is_used', 'is_verified', 'is_expired_display']
     list_filter = ['is_used', 'is_verified', 'created_at']
-    search_fields = ['user__username', 'user__email', 'otp_code']
+    search_fields = ['user__username', 'user__email']
     readonly_fields = ['created_at', 'expires_at']
     ordering = ['-created_at']
     
     fieldsets = (
         ('OTP Information', {
-            'fields': ('user', 'otp_code', 'created_at', 'expires_at')
+            'fields': ('user', 'created_at', 'expires_at')
         }),
         ('Status', {
             'fields': ('is_used', 'is_verified')
@@ -32,29 +142,40 @@ class OTPLogAdmin(admin.ModelAdmin):
         else:
             return format_html('<span style="color: green;">Valid</span>')
     is_expired_display.short_description = 'Expired'
-    
-    def get_queryset(self, request):
-        """Optimize queryset with select_related."""
-        return super().get_queryset(request).select_related('user')
 
 
 @admin.register(LoginAttempt)
-class LoginAttemptAdmin(admin.ModelAdmin):
-    list_display = ['email', 'ip_address', 'success', 'failure_reason', 'created_at', 'user_link']
-    list_filter = ['success', 'created_at', 'failure_reason']
-    search_fields = ['email', 'ip_address', 'user__username']
-    readonly_fields = ['created_at']
+class LoginAttemptAdmin(ShardedAdminMixin, admin.ModelAdmin):
+    list_display = ['email_display', 'ip_address', 'success', 'failure_reason_display', 'created_at', 'user_link']
+    list_filter = ['success', 'created_at', 'failure_code']
+    search_fields = ['email', 'user__email', 'ip_address', 'user__username']
+    readonly_fields = ['created_at', 'email_display', 'user_agent_display', 'failure_reason_display']
     ordering = ['-created_at']
     
     fieldsets = (
         ('Login Information', {
-            'fields': ('user', 'email', 'ip_address', 'user_agent')
+            'fields': ('user', 'email_display', 'ip_address', 'user_agent_display')
         }),
         ('Result', {
-            'fields': ('success', 'failure_reason', 'created_at')
+            'fields': ('success', 'failure_reason_display', 'created_at')
         }),
     )
     
+    def email_display(self, obj):
+        """Show the attempted email, falling back to the user's email."""
+        return obj.attempted_email
+    email_display.short_description = 'Email'
+    
+    def user_agent_display(self, obj):
+        """Show the interned or legacy user agent string."""
+        return obj.user_agent_display
+    user_agent_display.short_description = 'User agent'
+    
+    def failure_reason_display(self, obj):
+        """Show the failure reason label."""
+        return obj.failure_reason_display
+    failure_reason_display.short_description = 'Failure reason'
+    
     def user_link(self, obj):
         """Create a link to the user's admin page."""
         if obj.user:
@@ -63,6 +184,38 @@ class LoginAttemptAdmin(admin.ModelAdmin):
         return '-'
     user_link.short_description = 'User'
     
+    def get_queryset(self, request):
+        """Prefetch interned user agents from 'default'."""
+        return super().get_queryset(request).prefetch_related('agent')
+
+
+@admin.register(TrustedDevice)
+class TrustedDeviceAdmin(admin.ModelAdmin):
+    list_display = ['user', 'user_agent', 'created_at', 'last_used_at', 'expires_at', 'is_revoked']
+    list_filter = ['is_revoked', 'created_at']
+    search_fields = ['user__username', 'user__email']
+    readonly_fields = ['created_at', 'last_used_at']
+    exclude = ['token_hash']
+    ordering = ['-last_used_at']
+    actions = ['revoke_devices']
+    
+    def revoke_devices(self, request, queryset):
+        """Stop trusting the selected devices."""
+        updated = queryset.update(is_revoked=True)
+        self.message_user(request, f'{updated} device(s) revoked.')
+    revoke_devices.short_description = 'Revoke selected devices'
+    
+    def get_queryset(self, request):
+        """Optimize queryset with select_related."""
+        return super().get_queryset(request).select_related('user')
+
+
+@admin.register(SecuritySummary)
+class SecuritySummaryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'last_login_at', 'failed_attempts', 'otps_this_week', 'week_start', 'updated_at']
+    search_fields = ['user__username', 'user__email']
+    readonly_fields = ['updated_at']
+    
     def get_queryset(self, request):
         """Optimize queryset with select_related."""
         return super().get_queryset(request).select_related('user')
@@ -0,0 +1,150 @@
+"""
+JSON API for the login, OTP verification and OTP resend flow.
+
+Pending-OTP state travels in a signed token (returned by the login endpoint
+and sent back in the X-OTP-Token header) instead of the session, and no
+templates or messages are rendered. The token names the OTP it was issued
+for and stops working once that OTP is used or expired.
+"""
+import json
+import logging
+from django.conf import settings
+from django.contrib.auth import login
+from django.contrib.auth.models import User
+from django.core import signing
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from .forms import LoginForm, OTPVerificationForm
+from .models import OTPLog, TrustedDevice
+from .email_otp import generate_and_send_otp, verify_otp
+from .services import (
+    LOGIN_ACCOUNT_DISABLED, LOGIN_EMAIL_FAILED, LOGIN_INVALID_CREDENTIALS,
+    LOGIN_OTP_SENT, LOGIN_TRUSTED_DEVICE, start_login,
+)
+from .sharding import shard_for_user
+from .trusted_devices import remember_device
+
+logger = logging.getLogger(__name__)
+
+PENDING_OTP_SALT = 'authentication.api.pending_otp'
+
+LOGIN_ERROR_STATUS = {
+    LOGIN_INVALID_CREDENTIALS: 401,
+    LOGIN_ACCOUNT_DISABLED: 403,
+    LOGIN_EMAIL_FAILED: 502,
+}
+
+
+def api_response(data, status=200):
+    """Return a compact JSON response."""
+    return JsonResponse(data, status=status, json_dumps_params={'separators': (',', ':')})
+
+
+def read_payload(request):
+    """
+    Read request data from a JSON body.
+    
+    Only application/json is accepted: the views are CSRF exempt, and browsers
+    cannot send that content type cross-site without a CORS preflight.
+    """
+    if request.content_type != 'application/json':
+        return None
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def make_pending_token(otp_log):
+    """Sign the user and OTP ids of a login that still has to verify that OTP."""
+    return signing.dumps({'u': otp_log.user_id, 'o': otp_log.pk}, salt=PENDING_OTP_SALT)
+
+
+def get_pending_otp(request):
+    """
+    Return the (user, otp_log) named by the X-OTP-Token header.
+    
+    Returns (None, None) if the token is invalid, older than the OTP expiry,
+    or its OTP has been used.
+    """
+    token = request.headers.get('X-OTP-Token', '')
+    try:
+        pending = signing.loads(token, salt=PENDING_OTP_SALT, max_age=settings.OTP_EXPIRY_MINUTES * 60)
+        user_id, otp_log_id = pending['u'], pending['o']
+    except (signing.BadSignature, TypeError, KeyError):
+        return None, None
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return None, None
+    otp_log = OTPLog.objects.using(shard_for_user(user)).filter(
+        pk=otp_log_id, user=user, is_used=False
+    ).first()
+    if otp_log is None:
+        return None, None
+    return user, otp_log
+
+
+@csrf_exempt
+@require_POST
+def api_login_view(request):
+    """Step 1: check email and password, then send an OTP or accept a trusted device."""
+    data = read_payload(request)
+    form = LoginForm(data)
+    if data is None or not form.is_valid():
+        return api_response({'error': 'invalid_request'}, status=400)
+    
+    result = start_login(request, form.cleaned_data['email'], form.cleaned_data['password'])
+    
+    if result.status == LOGIN_TRUSTED_DEVICE:
+        login(request, result.user)
+        response = api_response({'status': 'ok'})
+        remember_device(response, result.device, result.device.rotate())
+        return response
+    if result.status == LOGIN_OTP_SENT:
+        return api_response({'status': 'otp_required', 'token': make_pending_token(result.otp_log)})
+    return api_response({'error': result.status}, status=LOGIN_ERROR_STATUS.get(result.status, 500))
+
+
+@csrf_exempt
+@require_POST
+def api_verify_otp_view(request):
+    """Step 2: verify the OTP for the pending user and start a session."""
+    user, pending_otp = get_pending_otp(request)
+    if user is None:
+        return api_response({'error': 'invalid_token'}, status=401)
+    
+    data = read_payload(request)
+    form = OTPVerificationForm(data)
+    if data is None or not form.is_valid():
+        return api_response({'error': 'invalid_request'}, status=400)
+    
+    is_valid, otp_log = verify_otp(user, form.cleaned_data['otp_code'])
+    if not is_valid:
+        error = 'otp_expired' if otp_log and otp_log.is_expired() else 'invalid_otp'
+        return api_response({'error': error}, status=400)
+    if otp_log.pk != pending_otp.pk:
+        # Another of the user's OTPs matched; retire the token's OTP as well
+        pending_otp.mark_as_used()
+    
+    login(request, user)
+    response = api_response({'status': 'ok'})
+    if form.cleaned_data['remember_device']:
+        device, token = TrustedDevice.issue(user, request.META.get('HTTP_USER_AGENT', ''))
+        remember_device(response, device, token)
+    return response
+
+
+@csrf_exempt
+@require_POST
+def api_resend_otp_view(request):
+    """Send a new OTP to the pending user and return a token for it."""
+    user, pending_otp = get_pending_otp(request)
+    if user is None:
+        return api_response({'error': 'invalid_token'}, status=401)
+    
+    otp_log, email_sent = generate_and_send_otp(user, force=True)
+    if not email_sent:
+        return api_response({'error': LOGIN_EMAIL_FAILED}, status=502)
+    return api_response({'status': 'otp_sent', 'token': make_pending_token(otp_log)})
@@ -2,13 +2,20 @@
 Email OTP functionality for 2FA authentication.
 """
 import logging
+import time
+from django.core.cache import cache
 from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
-from .models import OTPLog
+from .models import OTPLog, SecuritySummary, hash_otp_code
+from .profiling import phase
+from .sharding import shard_for_user
 
 logger = logging.getLogger(__name__)
 
+# Unused OTPs checked per verification (the latest issue plus recent resends)
+MAX_OTP_CANDIDATES = 5
+
 
 def send_otp_email(user, otp_log):
     """
@@ -16,7 +23,7 @@ def send_otp_email(user, otp_log):
     
     Args:
         user: User instance
-        otp_log: OTPLog instance containing the OTP code
+        otp_log: OTPLog instance carrying the plaintext ``otp_code`` from generation
     
     Returns:
         bool: True if email sent successfully, False otherwise
@@ -33,40 +40,37 @@ def send_otp_email(user, otp_log):
         }
         
         # Render email templates
-        html_message = render_to_string('emails/otp_email.html', context)
-        plain_message = render_to_string('emails/otp_email.txt', context)
+        with phase('render_email'):
+            html_message = render_to_string('emails/otp_email.html', context)
+            plain_message = render_to_string('emails/otp_email.txt', context)
         
         # Send email
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        with phase('smtp'):
+            send_mail(
+                subject=subject,
+                message=plain_message,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipient_list=[user.email],
+                html_message=html_message,
+                fail_silently=False,
+            )
         
-        logger.info(f"OTP email sent successfully to {user.email}")
+        logger.info("OTP email sent successfully to user %s", user.pk)
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send OTP email to {user.email}: {str(e)}")
+        logger.error("Failed to send OTP email to user %s: %s", user.pk, e)
         return False
 
 
-def generate_and_send_otp(user):
+def _issue_otp(user):
     """
-    Generate a new OTP and send it to the user's email.
-    
-    Args:
-        user: User instance
-    
-    Returns:
-        tuple: (otp_log, success) where success is bool indicating if email was sent
+    Generate a new OTP and send it to the user's email, without deduplication.
     """
     try:
         # Generate new OTP
         otp_log = OTPLog.generate_otp(user)
+        SecuritySummary.record_otp_issued(user)
         
         # Send OTP via email
         success = send_otp_email(user, otp_log)
@@ -74,45 +78,123 @@ def generate_and_send_otp(user):
         return otp_log, success
         
     except Exception as e:
-        logger.error(f"Failed to generate and send OTP for user {user.email}: {str(e)}")
+        logger.error("Failed to generate and send OTP for user %s: %s", user.pk, e)
         return None, False
 
 
+def _wait_for_issued_otp(result_key, lock_key, stale_id=None):
+    """
+    Poll the cache for the result of an issuance running in another request.
+    
+    A result equal to ``stale_id`` was stored before this request started
+    waiting and is ignored. Returns None if the other request released its
+    lock without a new result (e.g. the email failed) or the lock timed out.
+    """
+    deadline = time.monotonic() + settings.OTP_ISSUE_LOCK_SECONDS
+    while time.monotonic() < deadline:
+        otp_log_id = cache.get(result_key)
+        if otp_log_id is not None and otp_log_id != stale_id:
+            return otp_log_id
+        if cache.get(lock_key) is None:
+            return None
+        time.sleep(0.05)
+    return None
+
+
+def generate_and_send_otp(user, force=False):
+    """
+    Generate a new OTP and send it to the user's email.
+    
+    Issuance is idempotent per user within OTP_ISSUE_WINDOW_SECONDS: a
+    double-submitted or retried login shares the OTP (and the email) of the
+    first request instead of creating and mailing another one. Concurrent
+    requests are serialized with a cache lock.
+    
+    Args:
+        user: User instance
+        force: Always send a new email unless another issuance is in flight
+            right now (used for explicit resends)
+    
+    Returns:
+        tuple: (otp_log, success) where success is bool indicating if email was sent
+    """
+    result_key = f'otp-issue:{user.pk}'
+    lock_key = f'otp-issue-lock:{user.pk}'
+    
+    otp_log_id = None if force else cache.get(result_key)
+    acquired = otp_log_id is None and cache.add(lock_key, 1, settings.OTP_ISSUE_LOCK_SECONDS)
+    if acquired and not force:
+        # Another request may have finished issuing between the get and the add
+        otp_log_id = cache.get(result_key)
+    elif otp_log_id is None and not acquired:
+        # A forced send must not pick up the OTP of an earlier request
+        stale_id = cache.get(result_key) if force else None
+        otp_log_id = _wait_for_issued_otp(result_key, lock_key, stale_id)
+    
+    try:
+        if otp_log_id is not None:
+            otp_log = OTPLog.objects.using(shard_for_user(user)).filter(pk=otp_log_id, is_used=False).first()
+            if otp_log and not otp_log.is_expired():
+                logger.info("Reusing in-flight OTP for user %s", user.pk)
+                return otp_log, True
+        
+        otp_log, success = _issue_otp(user)
+        # Only successful sends are shared; failures can be retried at once
+        if success:
+            cache.set(result_key, otp_log.pk, settings.OTP_ISSUE_WINDOW_SECONDS)
+        return otp_log, success
+    finally:
+        if acquired:
+            cache.delete(lock_key)
+
+
 def verify_otp(user, otp_code):
     """
     Verify the OTP code for a user.
     
     Args:
         user: User instance
-        otp_code: 6-digit OTP code to verify
+        otp_code: OTP code to verify
     
     Returns:
         tuple: (is_valid, otp_log) where is_valid is bool and otp_log is the OTPLog instance
     """
     try:
-        # Get the most recent unused OTP for the user
-        otp_log = OTPLog.objects.filter(
+        otp_hash = hash_otp_code(otp_code)
+        
+        # Load the user's most recent unused OTPs from their shard and compare
+        # hashes in Python, so the code never appears in a SQL predicate
+        candidates = OTPLog.objects.using(shard_for_user(user)).filter(
             user=user,
-            is_used=False,
-            otp_code=otp_code
-        ).order_by('-created_at').first()
+            is_used=False
+        ).order_by('-created_at')[:MAX_OTP_CANDIDATES]
+        otp_log = None
+        for candidate in candidates:
+            if candidate.matches(otp_hash) and otp_log is None:
+                otp_log = candidate
         
         if not otp_log:
-            logger.warning(f"No valid OTP found for user {user.email}")
+            logger.warning("No valid OTP found for user %s", user.pk)
+            SecuritySummary.record_login_failure(user)
             return False, None
         
         # Check if OTP is expired
         if otp_log.is_expired():
-            logger.warning(f"OTP expired for user {user.email}")
+            logger.warning("OTP expired for user %s", user.pk)
+            SecuritySummary.record_login_failure(user)
             return False, otp_log
         
         # Mark OTP as used and verified
-        otp_log.mark_as_used()
-        otp_log.mark_as_verified()
+        if not otp_log.consume():
+            # A concurrent request (e.g. a double submit) used the same
+            # correct code first; that is not a failed attempt
+            logger.info("OTP already used by a concurrent request for user %s", user.pk)
+            return False, None
+        SecuritySummary.record_login_success(user)
         
-        logger.info(f"OTP verified successfully for user {user.email}")
+        logger.info("OTP verified successfully for user %s", user.pk)
         return True, otp_log
         
     except Exception as e:
-        logger.error(f"Failed to verify OTP for user {user.email}: {str(e)}")
+        logger.error("Failed to verify OTP for user %s: %s", user.pk, e)
         return False, None
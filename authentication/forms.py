@@ -2,6 +2,7 @@
 Forms for authentication app.
 """
 from django import forms
+from django.conf import settings
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 
@@ -61,22 +62,27 @@ class OTPVerificationForm(forms.Form):
     Form for OTP verification.
     """
     otp_code = forms.CharField(
-        max_length=6,
-        min_length=6,
+        max_length=settings.OTP_LENGTH,
+        min_length=settings.OTP_LENGTH,
         widget=forms.TextInput(attrs={
             'class': 'form-control text-center',
-            'placeholder': 'Enter 6-digit OTP',
-            'maxlength': '6',
-            'pattern': '[0-9]{6}',
+            'placeholder': f'Enter {settings.OTP_LENGTH}-digit OTP',
+            'maxlength': str(settings.OTP_LENGTH),
+            'pattern': f'[0-9]{{{settings.OTP_LENGTH}}}',
             'autofocus': True
         }),
-        help_text="Enter the 6-digit code sent to your email"
+        help_text=f"Enter the {settings.OTP_LENGTH}-digit code sent to your email"
+    )
+    remember_device = forms.BooleanField(
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label=f"Remember this device for {settings.TRUSTED_DEVICE_DAYS} days"
     )
     
     def clean_otp_code(self):
         otp_code = self.cleaned_data.get('otp_code')
         if not otp_code.isdigit():
             raise forms.ValidationError("OTP must contain only numbers.")
-        if len(otp_code) != 6:
-            raise forms.ValidationError("OTP must be exactly 6 digits.")
+        if len(otp_code) != settings.OTP_LENGTH:
+            raise forms.ValidationError(f"OTP must be exactly {settings.OTP_LENGTH} digits.")
         return otp_code
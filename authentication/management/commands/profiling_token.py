@@ -0,0 +1,15 @@
+"""
+Print a signed token for the request profiling header.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from authentication.profiling import make_profiling_token
+
+
+class Command(BaseCommand):
+    help = "Print a signed token that enables profiling for requests sending it in the profiling header."
+
+    def handle(self, *args, **options):
+        if not settings.PROFILING_ENABLED:
+            self.stderr.write("Warning: PROFILING_ENABLED is off, so the token will be ignored.")
+        self.stdout.write(f"{settings.PROFILING_HEADER}: {make_profiling_token()}")
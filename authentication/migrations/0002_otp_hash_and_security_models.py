@@ -0,0 +1,144 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:08
+
+import hashlib
+import hmac
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def hash_otp_codes(apps, schema_editor):
+    """
+    Replace each stored plaintext OTP code with its keyed HMAC-SHA256.
+    """
+    OTPLog = apps.get_model('authentication', 'OTPLog')
+    alias = schema_editor.connection.alias
+    key = settings.OTP_HMAC_KEY.encode()
+    batch = []
+    for otp_log in OTPLog.objects.using(alias).only('pk', 'otp_code').iterator(chunk_size=BATCH_SIZE):
+        otp_log.otp_hash = hmac.new(key, otp_log.otp_code.encode(), hashlib.sha256).hexdigest()
+        batch.append(otp_log)
+        if len(batch) == BATCH_SIZE:
+            OTPLog.objects.using(alias).bulk_update(batch, ['otp_hash'])
+            batch = []
+    if batch:
+        OTPLog.objects.using(alias).bulk_update(batch, ['otp_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuritySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_login_at', models.DateTimeField(blank=True, null=True)),
+                ('previous_login_at', models.DateTimeField(blank=True, null=True)),
+                ('failed_attempts', models.PositiveIntegerField(default=0, help_text='Failed attempts since the last login')),
+                ('failed_attempts_before_last_login', models.PositiveIntegerField(default=0)),
+                ('otps_this_week', models.PositiveIntegerField(default=0)),
+                ('week_start', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Security Summary',
+                'verbose_name_plural': 'Security Summaries',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrustedDevice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_hash', models.CharField(help_text='SHA-256 of the current device token', max_length=64)),
+                ('user_agent', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+                ('expires_at', models.DateTimeField()),
+                ('is_revoked', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name': 'Trusted Device',
+                'verbose_name_plural': 'Trusted Devices',
+                'ordering': ['-last_used_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserAgent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(help_text='SHA-256 of the user agent string', max_length=64, unique=True)),
+                ('value', models.TextField()),
+            ],
+            options={
+                'verbose_name': 'User Agent',
+                'verbose_name_plural': 'User Agents',
+            },
+        ),
+        migrations.AddField(
+            model_name='loginattempt',
+            name='failure_code',
+            field=models.PositiveSmallIntegerField(choices=[(0, ''), (1, 'Invalid credentials'), (2, 'User not found'), (3, 'Account disabled'), (4, 'Email sending failed'), (5, 'System error')], default=0),
+        ),
+        migrations.AddField(
+            model_name='otplog',
+            name='otp_hash',
+            field=models.CharField(default='', help_text='HMAC-SHA256 of the OTP code', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(hash_otp_codes, migrations.RunPython.noop, hints={'model_name': 'otplog'}),
+        migrations.RemoveField(
+            model_name='otplog',
+            name='otp_code',
+        ),
+        migrations.AlterField(
+            model_name='loginattempt',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='loginattempt',
+            name='failure_reason',
+            field=models.CharField(blank=True, help_text='Legacy failure text', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='loginattempt',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='login_attempts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='loginattempt',
+            name='user_agent',
+            field=models.TextField(blank=True, help_text='Legacy user agent text'),
+        ),
+        migrations.AlterField(
+            model_name='otplog',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='otp_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='otplog',
+            index=models.Index(fields=['user', 'is_used', '-created_at'], name='otplog_user_unused_idx'),
+        ),
+        migrations.AddField(
+            model_name='trusteddevice',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trusted_devices', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='securitysummary',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='security_summary', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='loginattempt',
+            name='agent',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='login_attempts', to='authentication.useragent'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+import hashlib
+from django.db import migrations, router, transaction
+from django.db.models import Q
+
+BATCH_SIZE = 1000
+
+FAILURE_CODES = {
+    'Invalid credentials': 1,
+    'User not found': 2,
+    'Account disabled': 3,
+    'Email sending failed': 4,
+    'System error': 5,
+}
+
+
+def compact_login_attempts(apps, schema_editor):
+    """
+    Intern legacy user agent strings, convert failure reasons to codes and drop
+    emails duplicated by the user FK.
+
+    Runs in batches that commit separately, so a large table is not locked
+    for the whole conversion and an interrupted run can simply be restarted.
+    """
+    LoginAttempt = apps.get_model('authentication', 'LoginAttempt')
+    UserAgent = apps.get_model('authentication', 'UserAgent')
+    alias = schema_editor.connection.alias
+    # UserAgent rows live on 'default' even when this runs against a shard
+    user_agent_alias = router.db_for_write(UserAgent)
+
+    pending = LoginAttempt.objects.using(alias).filter(
+        ~Q(user_agent='') | Q(failure_reason__in=FAILURE_CODES) | (Q(user__isnull=False) & ~Q(email=''))
+    ).order_by('pk')
+    agent_ids = {}
+
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        for attempt in batch:
+            if attempt.user_agent:
+                if attempt.user_agent not in agent_ids:
+                    digest = hashlib.sha256(attempt.user_agent.encode()).hexdigest()
+                    user_agent, _ = UserAgent.objects.using(user_agent_alias).get_or_create(
+                        hash=digest, defaults={'value': attempt.user_agent}
+                    )
+                    agent_ids[attempt.user_agent] = user_agent.pk
+                attempt.agent_id = agent_ids[attempt.user_agent]
+                attempt.user_agent = ''
+            if attempt.failure_reason in FAILURE_CODES:
+                attempt.failure_code = FAILURE_CODES[attempt.failure_reason]
+                attempt.failure_reason = ''
+            if attempt.user_id is not None:
+                attempt.email = ''
+        with transaction.atomic(using=alias):
+            LoginAttempt.objects.using(alias).bulk_update(
+                batch, ['agent', 'user_agent', 'failure_code', 'failure_reason', 'email']
+            )
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    # Each batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('authentication', '0002_otp_hash_and_security_models'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_login_attempts, migrations.RunPython.noop, hints={'model_name': 'loginattempt'}),
+    ]
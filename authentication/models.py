@@ -1,21 +1,47 @@
 """
 Authentication models for 2FA Email Login System.
 """
+import hashlib
+import hmac
 import secrets
-import string
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from django.db import models
+from functools import partial
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Case, F, When
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.conf import settings
+from .sharding import shard_for_user
+
+
+def generate_otp_code(length=None):
+    """
+    Generate a zero-padded numeric OTP code of the configured length.
+    """
+    length = length or settings.OTP_LENGTH
+    return str(secrets.randbelow(10 ** length)).zfill(length)
+
+
+def hash_otp_code(otp_code):
+    """
+    Return the keyed HMAC-SHA256 hex digest stored in place of the OTP code.
+    """
+    key = settings.OTP_HMAC_KEY.encode()
+    return hmac.new(key, otp_code.encode(), hashlib.sha256).hexdigest()
 
 
 class OTPLog(models.Model):
     """
     Model to store OTP codes for 2FA authentication.
     """
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='otp_logs')
-    otp_code = models.CharField(max_length=6, help_text="6-digit OTP code")
+    # No DB constraint: rows may live on a different shard than auth_user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='otp_logs', db_constraint=False)
+    otp_hash = models.CharField(max_length=64, help_text="HMAC-SHA256 of the OTP code")
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
@@ -25,30 +51,42 @@ class OTPLog(models.Model):
         ordering = ['-created_at']
         verbose_name = "OTP Log"
         verbose_name_plural = "OTP Logs"
+        indexes = [
+            models.Index(fields=['user', 'is_used', '-created_at'], name='otplog_user_unused_idx'),
+        ]
     
     def __str__(self):
-        return f"OTP for {self.user.email} - {self.otp_code}"
+        return f"OTP for {self.user.email} - {self.created_at:%Y-%m-%d %H:%M:%S}"
     
     @classmethod
     def generate_otp(cls, user):
         """
         Generate a new OTP for the user.
+        
+        Only the HMAC of the code is persisted. The plaintext code is attached
+        to the returned instance as ``otp_code`` so it can be emailed once.
         """
-        # Generate 6-digit OTP
-        otp_code = ''.join(secrets.choice(string.digits) for _ in range(6))
+        otp_code = generate_otp_code()
         
         # Calculate expiry time (2 minutes from now)
         expires_at = timezone.now() + timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
         
-        # Create OTP record
-        otp_log = cls.objects.create(
+        # Create OTP record on the user's shard
+        otp_log = cls.objects.using(shard_for_user(user)).create(
             user=user,
-            otp_code=otp_code,
+            otp_hash=hash_otp_code(otp_code),
             expires_at=expires_at
         )
+        otp_log.otp_code = otp_code
         
         return otp_log
     
+    def matches(self, otp_hash):
+        """
+        Compare a candidate OTP hash against the stored one in constant time.
+        """
+        return hmac.compare_digest(self.otp_hash, otp_hash)
+    
     def is_expired(self):
         """
         Check if the OTP has expired.
@@ -66,26 +104,189 @@ class OTPLog(models.Model):
         Mark the OTP as used.
         """
         self.is_used = True
-        self.save()
+        self.save(update_fields=['is_used'])
     
     def mark_as_verified(self):
         """
         Mark the OTP as verified.
         """
         self.is_verified = True
-        self.save()
+        self.save(update_fields=['is_verified'])
+    
+    def consume(self):
+        """
+        Mark the OTP as used and verified in a single UPDATE.
+        
+        Returns False if another request used the OTP first.
+        """
+        claimed = type(self).objects.using(self._state.db).filter(
+            pk=self.pk,
+            is_used=False
+        ).update(is_used=True, is_verified=True)
+        if claimed:
+            self.is_used = True
+            self.is_verified = True
+        return bool(claimed)
+
+
+class TrustedDevice(models.Model):
+    """
+    Model to store browsers that may skip OTP issuance after a password check.
+    
+    The browser holds a signed cookie with the device id and a random token;
+    only a hash of the token is stored and it is rotated on every use.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='trusted_devices')
+    token_hash = models.CharField(max_length=64, help_text="SHA-256 of the current device token")
+    user_agent = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+    is_revoked = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['-last_used_at']
+        verbose_name = "Trusted Device"
+        verbose_name_plural = "Trusted Devices"
+    
+    def __str__(self):
+        return f"Trusted device for {self.user.email} - {self.user_agent[:40]}"
+    
+    @staticmethod
+    def hash_token(token):
+        """
+        Hash a device token for storage.
+        """
+        return hashlib.sha256(token.encode()).hexdigest()
+    
+    @classmethod
+    def issue(cls, user, user_agent=''):
+        """
+        Create a trusted device for the user.
+        
+        Returns:
+            tuple: (device, token) where token is the plaintext value for the cookie
+        """
+        token = secrets.token_urlsafe(32)
+        device = cls.objects.create(
+            user=user,
+            token_hash=cls.hash_token(token),
+            user_agent=user_agent[:255],
+            expires_at=timezone.now() + timedelta(days=settings.TRUSTED_DEVICE_DAYS)
+        )
+        return device, token
+    
+    def matches(self, token):
+        """
+        Compare a presented token against the stored hash in constant time.
+        """
+        return hmac.compare_digest(self.token_hash, self.hash_token(token))
+    
+    def is_valid(self):
+        """
+        Check if the device is still trusted (not revoked, not expired).
+        """
+        return not self.is_revoked and timezone.now() <= self.expires_at
+    
+    def rotate(self):
+        """
+        Replace the device token and return the new plaintext value.
+        """
+        token = secrets.token_urlsafe(32)
+        self.token_hash = self.hash_token(token)
+        self.save(update_fields=['token_hash', 'last_used_at'])
+        return token
+    
+    def revoke(self):
+        """
+        Stop trusting the device.
+        """
+        self.is_revoked = True
+        self.save(update_fields=['is_revoked'])
+
+
+class UserAgent(models.Model):
+    """
+    Model to store each distinct user agent string once.
+    """
+    hash = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the user agent string")
+    value = models.TextField()
+    
+    class Meta:
+        verbose_name = "User Agent"
+        verbose_name_plural = "User Agents"
+    
+    def __str__(self):
+        return self.value
+    
+    @classmethod
+    def intern(cls, value):
+        """
+        Return the id of the row holding this user agent string, creating it if needed.
+        """
+        if not value:
+            return None
+        user_agent_id = _lookup_user_agent(value)
+        if user_agent_id is None:
+            digest = hashlib.sha256(value.encode()).hexdigest()
+            user_agent, _ = cls.objects.get_or_create(hash=digest, defaults={'value': value})
+            user_agent_id = user_agent.pk
+            # Only remember the id once the row is committed; an id from a
+            # transaction that rolls back would point at nothing.
+            transaction.on_commit(partial(_remember_user_agent, value, user_agent_id), using=user_agent._state.db)
+        return user_agent_id
+
+
+# LRU of committed UserAgent ids by user agent string
+_interned_user_agents = OrderedDict()
+_interned_user_agents_lock = threading.Lock()
+INTERNED_USER_AGENTS_MAX = 1024
+
+
+def _lookup_user_agent(value):
+    with _interned_user_agents_lock:
+        user_agent_id = _interned_user_agents.get(value)
+        if user_agent_id is not None:
+            _interned_user_agents.move_to_end(value)
+        return user_agent_id
+
+
+def _remember_user_agent(value, user_agent_id):
+    with _interned_user_agents_lock:
+        _interned_user_agents[value] = user_agent_id
+        _interned_user_agents.move_to_end(value)
+        if len(_interned_user_agents) > INTERNED_USER_AGENTS_MAX:
+            _interned_user_agents.popitem(last=False)
 
 
 class LoginAttempt(models.Model):
     """
     Model to track login attempts for security monitoring.
+    
+    ``email`` is only stored for attempts without a known user, and user
+    agents are interned in UserAgent. ``user_agent`` and ``failure_reason``
+    only keep text from before compaction that migration 0003 could not
+    convert.
     """
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='login_attempts', null=True, blank=True)
-    email = models.EmailField()
+    
+    class FailureReason(models.IntegerChoices):
+        NONE = 0, ''
+        INVALID_CREDENTIALS = 1, 'Invalid credentials'
+        USER_NOT_FOUND = 2, 'User not found'
+        ACCOUNT_DISABLED = 3, 'Account disabled'
+        EMAIL_SENDING_FAILED = 4, 'Email sending failed'
+        SYSTEM_ERROR = 5, 'System error'
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='login_attempts', null=True, blank=True,
+                             db_constraint=False)
+    email = models.EmailField(blank=True)
     ip_address = models.GenericIPAddressField()
-    user_agent = models.TextField(blank=True)
+    agent = models.ForeignKey(UserAgent, on_delete=models.PROTECT, related_name='login_attempts', null=True, blank=True,
+                              db_constraint=False)
+    user_agent = models.TextField(blank=True, help_text="Legacy user agent text")
     success = models.BooleanField(default=False)
-    failure_reason = models.CharField(max_length=100, blank=True)
+    failure_code = models.PositiveSmallIntegerField(choices=FailureReason.choices, default=FailureReason.NONE)
+    failure_reason = models.CharField(max_length=100, blank=True, help_text="Legacy failure text")
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -94,5 +295,130 @@ class LoginAttempt(models.Model):
         verbose_name_plural = "Login Attempts"
     
     def __str__(self):
-        status = "Success" if self.success else f"Failed: {self.failure_reason}"
-        return f"{self.email} - {status} - {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
+        status = "Success" if self.success else f"Failed: {self.failure_reason_display}"
+        return f"{self.attempted_email} - {status} - {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
+    
+    @property
+    def attempted_email(self):
+        return self.email or (self.user.email if self.user else '')
+    
+    @property
+    def user_agent_display(self):
+        return self.agent.value if self.agent else self.user_agent
+    
+    @property
+    def failure_reason_display(self):
+        return self.get_failure_code_display() or self.failure_reason
+
+
+def current_week_start():
+    """
+    Return the date of Monday of the current week.
+    """
+    today = timezone.localdate()
+    return today - timedelta(days=today.weekday())
+
+
+class SecuritySummary(models.Model):
+    """
+    Denormalized per-user security statistics for the dashboard.
+    
+    Updated incrementally as OTPs are issued and logins succeed or fail, so
+    reading it never aggregates over OTPLog or LoginAttempt.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='security_summary')
+    last_login_at = models.DateTimeField(null=True, blank=True)
+    previous_login_at = models.DateTimeField(null=True, blank=True)
+    failed_attempts = models.PositiveIntegerField(default=0, help_text="Failed attempts since the last login")
+    failed_attempts_before_last_login = models.PositiveIntegerField(default=0)
+    otps_this_week = models.PositiveIntegerField(default=0)
+    week_start = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Security Summary"
+        verbose_name_plural = "Security Summaries"
+    
+    def __str__(self):
+        return f"Security summary for {self.user.email}"
+    
+    @staticmethod
+    def cache_key(user_id):
+        return f'security-summary:{user_id}'
+    
+    @classmethod
+    def for_user(cls, user):
+        """
+        Return the user's summary, from the cache when possible.
+        """
+        key = cls.cache_key(user.pk)
+        summary = cache.get(key)
+        if summary is None:
+            summary, _ = cls.objects.get_or_create(user=user)
+            # The create path keeps the User on the instance; don't pickle it
+            # (and its password hash) into the shared cache
+            summary._state.fields_cache.clear()
+            cache.set(key, summary, settings.SECURITY_SUMMARY_CACHE_SECONDS)
+        return summary
+    
+    @classmethod
+    def _apply(cls, user, **changes):
+        """
+        Apply an atomic UPDATE to the user's summary row, creating it if needed.
+        """
+        changes['updated_at'] = timezone.now()
+        if not cls.objects.filter(user=user).update(**changes):
+            cls.objects.get_or_create(user=user)
+            cls.objects.filter(user=user).update(**changes)
+        cache.delete(cls.cache_key(user.pk))
+    
+    @classmethod
+    def record_otp_issued(cls, user):
+        """
+        Count a newly issued OTP towards this week's total.
+        """
+        week_start = current_week_start()
+        cls._apply(
+            user,
+            otps_this_week=Case(
+                When(week_start=week_start, then=F('otps_this_week') + 1),
+                default=1,
+            ),
+            week_start=week_start,
+        )
+    
+    @classmethod
+    def record_login_success(cls, user):
+        """
+        Record a completed login and start a new failed-attempt count.
+        """
+        cls._apply(
+            user,
+            previous_login_at=F('last_login_at'),
+            last_login_at=timezone.now(),
+            failed_attempts_before_last_login=F('failed_attempts'),
+            failed_attempts=0,
+        )
+    
+    @classmethod
+    def record_login_failure(cls, user):
+        """
+        Record a failed password or OTP attempt.
+        """
+        cls._apply(user, failed_attempts=F('failed_attempts') + 1)
+    
+    @property
+    def otps_issued_this_week(self):
+        return self.otps_this_week if self.week_start == current_week_start() else 0
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_rows(sender, instance, using, **kwargs):
+    """
+    Delete a user's OTP and audit rows from their shard.
+    
+    The cascade from User only reaches rows on the user's own database.
+    """
+    shard = shard_for_user(instance)
+    OTPLog.objects.using(shard).filter(user_id=instance.pk).delete()
+    LoginAttempt.objects.using(shard).filter(user_id=instance.pk).delete()
@@ -0,0 +1,176 @@
+"""
+On-demand request profiling for authentication views.
+
+ProfilingMiddleware is removed from the middleware chain at startup unless
+PROFILING_ENABLED is set. When enabled, a request is profiled if it carries
+a valid signed PROFILING_HEADER or is picked by PROFILING_SAMPLE_RATE.
+Profiles are written to PROFILING_DIR as cProfile ``.prof`` files or, in
+``sample`` mode, as folded stacks (``.folded``) for flamegraph.pl/speedscope.
+"""
+import cProfile
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from config.log import request_id_var
+
+logger = logging.getLogger(__name__)
+
+PROFILING_SALT = 'authentication.profiling'
+
+# Per-phase timings (ms) of the request being profiled; None when inactive
+_phase_timings = ContextVar('phase_timings', default=None)
+
+
+@contextmanager
+def phase(name):
+    """
+    Time a section of the current request if it is being profiled.
+    """
+    timings = _phase_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def make_profiling_token():
+    """
+    Create a signed value for the profiling header.
+    """
+    return signing.dumps('profile', salt=PROFILING_SALT)
+
+
+class StackSampler:
+    """
+    Statistical profiler that samples one thread's stack from a background thread.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfilingMiddleware:
+    """
+    Profile selected requests and record per-phase timings.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.output_dir = Path(settings.PROFILING_DIR)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def is_requested(self, request):
+        token = request.headers.get(settings.PROFILING_HEADER)
+        if not token:
+            return False
+        try:
+            signing.loads(token, salt=PROFILING_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+        except signing.BadSignature:
+            return False
+        return True
+
+    def __call__(self, request):
+        requested = self.is_requested(request)
+        if not requested and random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        timings = {}
+        token = _phase_timings.set(timings)
+        if settings.PROFILING_MODE == 'sample':
+            profiler = StackSampler(settings.PROFILING_SAMPLE_INTERVAL)
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            timings['total'] = (time.perf_counter() - start) * 1000
+            if isinstance(profiler, StackSampler):
+                profiler.stop()
+            else:
+                profiler.disable()
+            _phase_timings.reset(token)
+
+        self.write_profile(request, profiler, timings)
+        if requested:
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={duration:.2f}' for name, duration in timings.items()
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # SessionMiddleware saves the session after the view returns; wrap the
+        # save so its cost shows up as its own phase
+        session = getattr(request, 'session', None)
+        if session is not None and _phase_timings.get() is not None:
+            save = session.save
+
+            def timed_save(*args, **kwargs):
+                with phase('session_save'):
+                    return save(*args, **kwargs)
+            session.save = timed_save
+        return None
+
+    def write_profile(self, request, profiler, timings):
+        view_name = request.resolver_match.view_name if request.resolver_match else 'unresolved'
+        stem = '{}-{}-{}'.format(
+            time.strftime('%Y%m%dT%H%M%S'),
+            view_name.replace(':', '.'),
+            request_id_var.get() or 'request',
+        )
+        try:
+            if isinstance(profiler, StackSampler):
+                profiler.write(self.output_dir / f'{stem}.folded')
+            else:
+                profiler.dump_stats(self.output_dir / f'{stem}.prof')
+            with open(self.output_dir / f'{stem}.json', 'w') as f:
+                json.dump({'path': request.path, 'view_name': view_name, 'phases_ms': timings}, f)
+        except OSError as e:
+            logger.error("Failed to write profile %s: %s", stem, e)
+            return
+        logger.info("Wrote profile %s", stem, extra={'latency_ms': round(timings['total'], 2)})
@@ -0,0 +1,52 @@
+"""
+Database router for sharded OTP and audit data.
+"""
+from django.contrib.auth.models import User
+from .sharding import get_shards, is_sharded, shard_for_instance, shard_for_user
+
+
+class AuditShardRouter:
+    """
+    Route OTPLog and LoginAttempt to their user's shard and all other models to 'default'.
+    
+    Sharded queries without an instance hint fall through to 'default'; use
+    ``.using(shard_for_user(user))`` for those.
+    """
+
+    def _shard_from_hints(self, model, hints):
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        if isinstance(instance, User):
+            # Related manager, e.g. user.otp_logs.all()
+            return shard_for_user(instance)
+        if isinstance(instance, model):
+            # A loaded row stays on the database it came from, which may no
+            # longer match its hash after AUDIT_SHARDS changed
+            if instance._state.db and not instance._state.adding:
+                return instance._state.db
+            return shard_for_instance(instance)
+        return None
+
+    def db_for_read(self, model, **hints):
+        if is_sharded(model):
+            return self._shard_from_hints(model, hints)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        if is_sharded(model):
+            return self._shard_from_hints(model, hints)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded(type(obj1)) or is_sharded(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'authentication' and model_name in ('otplog', 'loginattempt'):
+            # 'default' always has the tables so cascades from User still work
+            return db == 'default' or db in get_shards()
+        if db in get_shards() and db != 'default':
+            return False
+        return None
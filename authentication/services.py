@@ -0,0 +1,115 @@
+"""
+Login flow services shared by the HTML views and the JSON API.
+"""
+import logging
+from collections import namedtuple
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from .models import LoginAttempt, SecuritySummary, UserAgent
+from .email_otp import generate_and_send_otp
+from .profiling import phase
+from .sharding import shard_for_email, shard_for_user
+from .trusted_devices import get_trusted_device
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of start_login()
+LOGIN_TRUSTED_DEVICE = 'trusted_device'
+LOGIN_OTP_SENT = 'otp_sent'
+LOGIN_EMAIL_FAILED = 'email_failed'
+LOGIN_ACCOUNT_DISABLED = 'account_disabled'
+LOGIN_INVALID_CREDENTIALS = 'invalid_credentials'
+LOGIN_ERROR = 'error'
+
+LoginResult = namedtuple('LoginResult', ['status', 'user', 'otp_log', 'device'])
+
+
+def get_client_ip(request):
+    """Get client IP address from request."""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0]
+    else:
+        ip = request.META.get('REMOTE_ADDR')
+    return ip
+
+
+def log_login_attempt(email, ip_address, user_agent, success=False,
+                      failure_reason=LoginAttempt.FailureReason.NONE, user=None):
+    """Log login attempt for security monitoring."""
+    try:
+        shard = shard_for_user(user) if user is not None else shard_for_email(email)
+        LoginAttempt.objects.using(shard).create(
+            user=user,
+            # The email is only kept when it doesn't belong to a known user
+            email='' if user is not None else email,
+            ip_address=ip_address,
+            agent_id=UserAgent.intern(user_agent),
+            success=success,
+            failure_code=failure_reason
+        )
+        if user is not None and not success:
+            SecuritySummary.record_login_failure(user)
+    except Exception as e:
+        logger.error("Failed to log login attempt: %s", e)
+
+
+def start_login(request, email, password):
+    """
+    Check the user's password and either recognise a trusted device or send an OTP.
+    
+    The login attempt is recorded; establishing the session (or pending OTP
+    state) is left to the caller.
+    
+    Args:
+        request: HttpRequest (used for authentication, IP, user agent and device cookie)
+        email: Email address entered by the user
+        password: Password entered by the user
+    
+    Returns:
+        LoginResult: (status, user, otp_log, device) where status is one of the LOGIN_* constants
+    """
+    ip_address = get_client_ip(request)
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    
+    try:
+        # Find user by email
+        with phase('user_lookup'):
+            account = User.objects.get(email=email)
+        
+        # Authenticate user
+        with phase('authenticate'):
+            user = authenticate(request, username=account.username, password=password)
+        
+        if user is None:
+            log_login_attempt(email, ip_address, user_agent, success=False, failure_reason=LoginAttempt.FailureReason.INVALID_CREDENTIALS, user=account)
+            return LoginResult(LOGIN_INVALID_CREDENTIALS, None, None, None)
+        
+        if not user.is_active:
+            log_login_attempt(email, ip_address, user_agent, success=False, failure_reason=LoginAttempt.FailureReason.ACCOUNT_DISABLED, user=user)
+            return LoginResult(LOGIN_ACCOUNT_DISABLED, None, None, None)
+        
+        # Recognised browsers skip OTP issuance
+        device = get_trusted_device(request, user)
+        if device:
+            log_login_attempt(email, ip_address, user_agent, success=True, user=user)
+            SecuritySummary.record_login_success(user)
+            return LoginResult(LOGIN_TRUSTED_DEVICE, user, None, device)
+        
+        # Generate and send OTP
+        otp_log, email_sent = generate_and_send_otp(user)
+        
+        if not email_sent:
+            log_login_attempt(email, ip_address, user_agent, success=False, failure_reason=LoginAttempt.FailureReason.EMAIL_SENDING_FAILED)
+            return LoginResult(LOGIN_EMAIL_FAILED, user, None, None)
+        
+        log_login_attempt(email, ip_address, user_agent, success=True, user=user)
+        return LoginResult(LOGIN_OTP_SENT, user, otp_log, None)
+    
+    except User.DoesNotExist:
+        log_login_attempt(email, ip_address, user_agent, success=False, failure_reason=LoginAttempt.FailureReason.USER_NOT_FOUND)
+        return LoginResult(LOGIN_INVALID_CREDENTIALS, None, None, None)
+    except Exception as e:
+        logger.exception("Login error: %s", e)
+        log_login_attempt(email, ip_address, user_agent, success=False, failure_reason=LoginAttempt.FailureReason.SYSTEM_ERROR)
+        return LoginResult(LOGIN_ERROR, None, None, None)
@@ -0,0 +1,81 @@
+"""
+Horizontal sharding of OTP and audit data by user.
+
+OTPLog and LoginAttempt rows live on one of the databases listed in
+settings.AUDIT_SHARDS, chosen by a stable hash of the user id (or of the
+email for attempts by unknown users). Everything else stays on 'default'.
+"""
+import heapq
+import zlib
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import transaction
+
+SHARDED_MODELS = {'otplog', 'loginattempt'}
+
+
+def get_shards():
+    """Return the configured shard database aliases."""
+    return settings.AUDIT_SHARDS
+
+
+def _pick_shard(key):
+    shards = get_shards()
+    return shards[zlib.crc32(key.encode()) % len(shards)]
+
+
+def shard_for_user(user):
+    """Return the database alias holding OTP and audit rows for a user (or user id)."""
+    user_id = getattr(user, 'pk', user)
+    return _pick_shard(f'user:{user_id}')
+
+
+def shard_for_email(email):
+    """Return the database alias holding audit rows for an email with no known user."""
+    return _pick_shard(f'email:{email.strip().lower()}')
+
+
+def shard_for_instance(instance):
+    """Return the database alias for an OTPLog or LoginAttempt instance."""
+    if instance.user_id is not None:
+        return shard_for_user(instance.user_id)
+    return shard_for_email(instance.email)
+
+
+def is_sharded(model):
+    """Check if a model's rows are spread across the shards."""
+    return model._meta.app_label == 'authentication' and model._meta.model_name in SHARDED_MODELS
+
+
+def scatter_gather(queryset, limit, ordering='-created_at'):
+    """
+    Run a query on every shard and merge the results.
+    
+    Each shard returns at most ``limit`` rows already sorted by ``ordering``
+    (a single field, optionally prefixed with '-'); the sorted streams are
+    merged so only ``limit`` rows are kept overall.
+    
+    Returns:
+        list: Up to ``limit`` model instances ordered across all shards
+    """
+    field = ordering.lstrip('-')
+    descending = ordering.startswith('-')
+    streams = [
+        list(queryset.using(alias).order_by(ordering)[:limit])
+        for alias in get_shards()
+    ]
+    merged = heapq.merge(*streams, key=lambda obj: getattr(obj, field), reverse=descending)
+    return list(merged)[:limit]
+
+
+def atomic_all_databases():
+    """
+    Open a transaction on 'default' and every shard.
+    
+    Returns:
+        ExitStack: Context manager that commits or rolls back all of them together
+    """
+    stack = ExitStack()
+    for alias in dict.fromkeys(['default', *get_shards()]):
+        stack.enter_context(transaction.atomic(using=alias))
+    return stack
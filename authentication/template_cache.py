@@ -0,0 +1,46 @@
+"""
+Template cache warm-up for production workers.
+"""
+import logging
+import time
+from pathlib import Path
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+
+def iter_project_templates():
+    """
+    Yield the names of all templates under the configured template DIRS.
+    """
+    for engine in settings.TEMPLATES:
+        for directory in engine.get('DIRS', []):
+            directory = Path(directory)
+            for path in sorted(directory.rglob('*')):
+                if path.is_file() and path.suffix in TEMPLATE_EXTENSIONS:
+                    yield path.relative_to(directory).as_posix()
+
+
+def warm_template_cache():
+    """
+    Compile every project template into the cached loader.
+    
+    Returns:
+        int: Number of templates compiled
+    """
+    start = time.perf_counter()
+    compiled = 0
+    for name in iter_project_templates():
+        try:
+            get_template(name)
+            compiled += 1
+        except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+            logger.error("Failed to compile template %s: %s", name, e)
+    
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info("Compiled %d templates in %.1f ms", compiled, elapsed_ms)
+    return compiled
@@ -0,0 +1,57 @@
+"""
+Trusted device ("remember this device") support for 2FA authentication.
+"""
+import logging
+from django.conf import settings
+from .models import TrustedDevice
+
+logger = logging.getLogger(__name__)
+
+COOKIE_SALT = 'authentication.trusted_device'
+
+
+def get_trusted_device(request, user):
+    """
+    Return the trusted device presented by the request for this user.
+    
+    Args:
+        request: HttpRequest carrying the trusted device cookie
+        user: Authenticated User instance
+    
+    Returns:
+        TrustedDevice or None if the cookie is missing, tampered, revoked or expired
+    """
+    value = request.get_signed_cookie(
+        settings.TRUSTED_DEVICE_COOKIE_NAME,
+        default=None,
+        salt=COOKIE_SALT,
+        max_age=settings.TRUSTED_DEVICE_DAYS * 24 * 60 * 60,
+    )
+    if not value:
+        return None
+    
+    device_id, _, token = value.partition(':')
+    if not device_id.isdigit() or not token:
+        return None
+    
+    device = TrustedDevice.objects.filter(pk=device_id, user=user).first()
+    if not device or not device.is_valid() or not device.matches(token):
+        logger.warning("Rejected trusted device cookie for user %s", user.pk)
+        return None
+    
+    return device
+
+
+def remember_device(response, device, token):
+    """
+    Store the device token in a signed, HTTP-only cookie on the response.
+    """
+    response.set_signed_cookie(
+        settings.TRUSTED_DEVICE_COOKIE_NAME,
+        f'{device.pk}:{token}',
+        salt=COOKIE_SALT,
+        max_age=settings.TRUSTED_DEVICE_DAYS * 24 * 60 * 60,
+        secure=settings.SESSION_COOKIE_SECURE,
+        httponly=True,
+        samesite='Lax',
+    )
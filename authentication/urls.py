@@ -2,7 +2,7 @@
 URL configuration for authentication app.
 """
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'authentication'
 
@@ -14,4 +14,7 @@ urlpatterns = [
     path('dashboard/', views.dashboard_view, name='dashboard'),
     path('logout/', views.logout_view, name='logout'),
     path('resend-otp/', views.resend_otp_view, name='resend_otp'),
+    path('api/login/', api.api_login_view, name='api_login'),
+    path('api/verify-otp/', api.api_verify_otp_view, name='api_verify_otp'),
+    path('api/resend-otp/', api.api_resend_otp_view, name='api_resend_otp'),
 ]
@@ -3,7 +3,7 @@ Views for authentication app.
 """
 import logging
 from django.shortcuts import render, redirect
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
@@ -12,37 +12,17 @@ from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.contrib.auth.models import User
 from .forms import UserRegistrationForm, LoginForm, OTPVerificationForm
-from .models import LoginAttempt, OTPLog
+from .models import SecuritySummary, TrustedDevice
 from .email_otp import generate_and_send_otp, verify_otp
+from .services import (
+    LOGIN_ACCOUNT_DISABLED, LOGIN_EMAIL_FAILED, LOGIN_INVALID_CREDENTIALS,
+    LOGIN_OTP_SENT, LOGIN_TRUSTED_DEVICE, start_login,
+)
+from .trusted_devices import remember_device
 
 logger = logging.getLogger(__name__)
 
 
-def get_client_ip(request):
-    """Get client IP address from request."""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
-def log_login_attempt(email, ip_address, user_agent, success=False, failure_reason='', user=None):
-    """Log login attempt for security monitoring."""
-    try:
-        LoginAttempt.objects.create(
-            user=user,
-            email=email,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            success=success,
-            failure_reason=failure_reason
-        )
-    except Exception as e:
-        logger.error(f"Failed to log login attempt: {str(e)}")
-
-
 def register_view(request):
     """User registration view."""
     if request.method == 'POST':
@@ -66,46 +46,27 @@ def login_view(request):
         form = LoginForm(request.POST)
         if form.is_valid():
             email = form.cleaned_data['email']
-            password = form.cleaned_data['password']
-            ip_address = get_client_ip(request)
-            user_agent = request.META.get('HTTP_USER_AGENT', '')
+            result = start_login(request, email, form.cleaned_data['password'])
             
-            try:
-                # Find user by email
-                user = User.objects.get(email=email)
-                
-                # Authenticate user
-                user = authenticate(request, username=user.username, password=password)
-                
-                if user is not None:
-                    if user.is_active:
-                        # Generate and send OTP
-                        otp_log, email_sent = generate_and_send_otp(user)
-                        
-                        if email_sent:
-                            # Store user ID in session for OTP verification
-                            request.session['otp_user_id'] = user.id
-                            request.session['otp_log_id'] = otp_log.id
-                            
-                            log_login_attempt(email, ip_address, user_agent, success=True, user=user)
-                            messages.success(request, f'OTP sent to {email}. Please check your email.')
-                            return redirect('authentication:verify_otp')
-                        else:
-                            log_login_attempt(email, ip_address, user_agent, success=False, failure_reason='Email sending failed')
-                            messages.error(request, 'Failed to send OTP. Please try again.')
-                    else:
-                        log_login_attempt(email, ip_address, user_agent, success=False, failure_reason='Account disabled')
-                        messages.error(request, 'Your account is disabled.')
-                else:
-                    log_login_attempt(email, ip_address, user_agent, success=False, failure_reason='Invalid credentials')
-                    messages.error(request, 'Invalid email or password.')
-                    
-            except User.DoesNotExist:
-                log_login_attempt(email, ip_address, user_agent, success=False, failure_reason='User not found')
+            if result.status == LOGIN_TRUSTED_DEVICE:
+                login(request, result.user)
+                messages.success(request, 'Login successful!')
+                response = redirect('authentication:dashboard')
+                remember_device(response, result.device, result.device.rotate())
+                return response
+            elif result.status == LOGIN_OTP_SENT:
+                # Store user ID in session for OTP verification
+                request.session['otp_user_id'] = result.user.id
+                request.session['otp_log_id'] = result.otp_log.id
+                messages.success(request, f'OTP sent to {email}. Please check your email.')
+                return redirect('authentication:verify_otp')
+            elif result.status == LOGIN_EMAIL_FAILED:
+                messages.error(request, 'Failed to send OTP. Please try again.')
+            elif result.status == LOGIN_ACCOUNT_DISABLED:
+                messages.error(request, 'Your account is disabled.')
+            elif result.status == LOGIN_INVALID_CREDENTIALS:
                 messages.error(request, 'Invalid email or password.')
-            except Exception as e:
-                logger.error(f"Login error: {str(e)}")
-                log_login_attempt(email, ip_address, user_agent, success=False, failure_reason='System error')
+            else:
                 messages.error(request, 'An error occurred. Please try again.')
     else:
         form = LoginForm()
@@ -147,7 +108,11 @@ def verify_otp_view(request):
                 request.session.pop('otp_log_id', None)
                 
                 messages.success(request, 'Login successful!')
-                return redirect('authentication:dashboard')
+                response = redirect('authentication:dashboard')
+                if form.cleaned_data['remember_device']:
+                    device, token = TrustedDevice.issue(user, request.META.get('HTTP_USER_AGENT', ''))
+                    remember_device(response, device, token)
+                return response
             else:
                 if otp_log and otp_log.is_expired():
                     messages.error(request, 'OTP has expired. Please request a new one.')
@@ -165,12 +130,12 @@ def verify_otp_view(request):
 @login_required
 def dashboard_view(request):
     """User dashboard after successful login."""
-    # Get recent OTP logs for the user
-    recent_otps = OTPLog.objects.filter(user=request.user).order_by('-created_at')[:5]
+    # Single-row (usually cached) read, however much history the user has
+    summary = SecuritySummary.for_user(request.user)
     
     return render(request, 'authentication/dashboard.html', {
         'user': request.user,
-        'recent_otps': recent_otps
+        'summary': summary
     })
 
 
@@ -181,7 +146,6 @@ def logout_view(request):
     return redirect('authentication:login')
 
 
-@login_required
 def resend_otp_view(request):
     """Resend OTP view."""
     if request.method == 'POST':
@@ -191,7 +155,7 @@ def resend_otp_view(request):
         
         try:
             user = User.objects.get(id=user_id)
-            otp_log, email_sent = generate_and_send_otp(user)
+            otp_log, email_sent = generate_and_send_otp(user, force=True)
             
             if email_sent:
                 request.session['otp_log_id'] = otp_log.id
@@ -207,7 +171,7 @@ def resend_otp_view(request):
         except User.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'User not found'})
         except Exception as e:
-            logger.error(f"Resend OTP error: {str(e)}")
+            logger.exception("Resend OTP error: %s", e)
             return JsonResponse({'success': False, 'message': 'An error occurred'})
     
     return JsonResponse({'success': False, 'message': 'Invalid request method'})
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+HTML vs JSON API benchmark for 2FA Email Login System.
+Compares per-request CPU time and response bytes for the login and OTP
+verification steps. All database rows are rolled back and emails go to
+the in-memory backend.
+
+Usage:
+    python benchmarks/bench_api.py
+"""
+
+import os
+import sys
+import time
+import django
+from pathlib import Path
+
+# Add the project directory to Python path
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from authentication.sharding import atomic_all_databases
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment
+
+ITERATIONS = 200
+EMAIL = 'bench-api@example.com'
+PASSWORD = 'bench-password-123'
+
+
+def measure(label, send):
+    """Run a request repeatedly and report CPU time and response size."""
+    cache.clear()
+    start = time.process_time()
+    size = 0
+    for _ in range(ITERATIONS):
+        response = send()
+        size = len(response.content)
+    cpu_us = (time.process_time() - start) / ITERATIONS * 1e6
+    print(f"{label:<40} {cpu_us:10.1f} us CPU {size:8d} bytes")
+
+
+def run():
+    html = Client()
+    api = Client()
+
+    # Put the HTML client in the OTP step so verify renders the form
+    html.post('/auth/login/', {'email': EMAIL, 'password': PASSWORD})
+    token = api.post('/auth/api/login/', {'email': EMAIL, 'password': PASSWORD},
+                     content_type='application/json').json()['token']
+
+    print(f"{'request':<40} {'cpu/request':>13} {'body':>14}")
+    print("=" * 70)
+    measure("HTML  POST /auth/login/",
+            lambda: Client().post('/auth/login/', {'email': EMAIL, 'password': PASSWORD}, follow=True))
+    measure("JSON  POST /auth/api/login/",
+            lambda: Client().post('/auth/api/login/', {'email': EMAIL, 'password': PASSWORD},
+                                  content_type='application/json'))
+    measure("HTML  POST /auth/verify-otp/ (wrong)",
+            lambda: html.post('/auth/verify-otp/', {'otp_code': '000000'}))
+    measure("JSON  POST /auth/api/verify-otp/ (wrong)",
+            lambda: api.post('/auth/api/verify-otp/', {'otp_code': '000000'},
+                             content_type='application/json', HTTP_X_OTP_TOKEN=token))
+
+
+class Rollback(Exception):
+    pass
+
+
+def main():
+    setup_test_environment()
+    # A fast hasher keeps password hashing from drowning out the framework cost
+    with override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+        ALLOWED_HOSTS=['testserver'],
+    ):
+        try:
+            with atomic_all_databases():
+                User.objects.create_user('bench-api', EMAIL, PASSWORD)
+                run()
+                raise Rollback
+        except Rollback:
+            pass
+
+
+if __name__ == '__main__':
+    main()
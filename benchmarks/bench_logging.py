@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Logging overhead benchmark for 2FA Email Login System.
+Measures the cost of a log call on the request thread for the legacy
+synchronous handler and for the queued JSON pipeline.
+
+Usage:
+    python benchmarks/bench_logging.py
+"""
+
+import os
+import sys
+import logging
+import time
+import timeit
+from pathlib import Path
+
+# Add the project directory to Python path
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+
+from config.log import JsonFormatter, QueueStreamHandler, RequestContextFilter, SamplingFilter, request_id_var
+
+ITERATIONS = 50000
+
+
+class User:
+    pk = 42
+    email = 'bench@example.com'
+
+
+class SlowStream:
+    """A stream whose writes block briefly, like a busy pipe or log shipper."""
+
+    def write(self, data):
+        time.sleep(0.0001)
+
+    def flush(self):
+        pass
+
+
+def build_logger(name, handler, filters=()):
+    bench_logger = logging.getLogger(name)
+    bench_logger.handlers = [handler]
+    bench_logger.propagate = False
+    bench_logger.setLevel(logging.INFO)
+    for log_filter in filters:
+        bench_logger.addFilter(log_filter)
+    return bench_logger
+
+
+def report(label, seconds):
+    print(f"{label:<44} {seconds / ITERATIONS * 1e6:8.2f} us/call")
+
+
+def main():
+    devnull = open(os.devnull, 'w')
+    user = User()
+    request_id_var.set('bench-request')
+
+    sync_handler = logging.StreamHandler(devnull)
+    sync_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+    legacy = build_logger('bench.legacy', sync_handler)
+
+    queue_handler = QueueStreamHandler(stream=devnull)
+    queue_handler.setFormatter(JsonFormatter())
+    queue_handler.addFilter(RequestContextFilter())
+    queued = build_logger('bench.queued', queue_handler)
+    sampled = build_logger('bench.sampled', queue_handler, [SamplingFilter(rate=0.1)])
+
+    slow_sync_handler = logging.StreamHandler(SlowStream())
+    slow_sync_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+    slow_legacy = build_logger('bench.slow_legacy', slow_sync_handler)
+    slow_queue_handler = QueueStreamHandler(stream=SlowStream())
+    slow_queue_handler.setFormatter(JsonFormatter())
+    slow_queue_handler.addFilter(RequestContextFilter())
+    slow_queued = build_logger('bench.slow_queued', slow_queue_handler)
+
+    print("Request-thread cost per log call")
+    print("=" * 60)
+    report("legacy: sync handler, f-string",
+           timeit.timeit(lambda: legacy.warning(f"No valid OTP found for user {user.email}"), number=ITERATIONS))
+    report("queued JSON, lazy args",
+           timeit.timeit(lambda: queued.warning("No valid OTP found for user %s", user.pk), number=ITERATIONS))
+    report("queued JSON, lazy args, 10% sampled",
+           timeit.timeit(lambda: sampled.warning("No valid OTP found for user %s", user.pk), number=ITERATIONS))
+    report("disabled level, f-string",
+           timeit.timeit(lambda: legacy.debug(f"OTP lookup for user {user.email}"), number=ITERATIONS))
+    report("disabled level, lazy args",
+           timeit.timeit(lambda: legacy.debug("OTP lookup for user %s", user.pk), number=ITERATIONS))
+
+    print("\nWith a stream that blocks 100 us per write")
+    print("=" * 60)
+    report("legacy: sync handler, f-string",
+           timeit.timeit(lambda: slow_legacy.warning(f"No valid OTP found for user {user.email}"), number=ITERATIONS))
+    report("queued JSON, lazy args",
+           timeit.timeit(lambda: slow_queued.warning("No valid OTP found for user %s", user.pk), number=ITERATIONS))
+
+    queue_handler.close()
+    slow_queue_handler.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+OTP issue/verify benchmark for 2FA Email Login System.
+Compares the legacy plaintext OTP path against the hashed OTP path.
+The legacy database path is emulated by storing the plaintext code in the
+hash column and matching it in SQL, as the old implementation did.
+
+Usage:
+    python benchmarks/bench_otp.py          # in-process generation/hashing only
+    python benchmarks/bench_otp.py --db     # also issue/verify against the configured database
+"""
+
+import os
+import sys
+import string
+import secrets
+import time
+import timeit
+import logging
+import django
+from datetime import timedelta
+from pathlib import Path
+
+# Add the project directory to Python path
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from authentication.sharding import atomic_all_databases, shard_for_user
+from authentication.models import OTPLog, generate_otp_code, hash_otp_code
+from authentication.email_otp import verify_otp
+
+ITERATIONS = 100000
+DB_ITERATIONS = 500
+
+
+def legacy_generate():
+    return ''.join(secrets.choice(string.digits) for _ in range(6))
+
+
+def report(label, seconds, iterations):
+    per_op = seconds / iterations * 1e6
+    print(f"{label:<40} {per_op:8.2f} us/op  {iterations / seconds:12.0f} ops/s")
+
+
+def bench_in_process():
+    """Benchmark OTP generation and hashing without touching the database."""
+    print("In-process")
+    print("=" * 70)
+    report("legacy generate (6x secrets.choice)", timeit.timeit(legacy_generate, number=ITERATIONS), ITERATIONS)
+    report("generate (secrets.randbelow)", timeit.timeit(generate_otp_code, number=ITERATIONS), ITERATIONS)
+
+    code = generate_otp_code()
+    stored = hash_otp_code(code)
+    report("hash_otp_code", timeit.timeit(lambda: hash_otp_code(code), number=ITERATIONS), ITERATIONS)
+    report("legacy compare (==)", timeit.timeit(lambda: code == code, number=ITERATIONS), ITERATIONS)
+    otp_log = OTPLog(otp_hash=stored)
+    report("hash + compare_digest",
+           timeit.timeit(lambda: otp_log.matches(hash_otp_code(code)), number=ITERATIONS), ITERATIONS)
+
+
+def legacy_issue(user):
+    """Issue an OTP the way the plaintext implementation did."""
+    return OTPLog.objects.using(shard_for_user(user)).create(
+        user=user,
+        otp_hash=legacy_generate(),
+        expires_at=timezone.now() + timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
+    )
+
+
+def legacy_verify(user, otp_code):
+    """Verify an OTP the way the plaintext implementation did."""
+    otp_log = OTPLog.objects.using(shard_for_user(user)).filter(
+        user=user,
+        is_used=False,
+        otp_hash=otp_code
+    ).order_by('-created_at').first()
+    if not otp_log or otp_log.is_expired():
+        return False, otp_log
+    otp_log.is_used = True
+    otp_log.save()
+    otp_log.is_verified = True
+    otp_log.save()
+    return True, otp_log
+
+
+def time_issue_verify(user, issue, verify, code_of):
+    """Alternate issue and verify calls, timing each side separately."""
+    issue_seconds = verify_seconds = 0.0
+    for _ in range(DB_ITERATIONS):
+        start = time.perf_counter()
+        otp_log = issue(user)
+        issue_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        is_valid, _ = verify(user, code_of(otp_log))
+        verify_seconds += time.perf_counter() - start
+        assert is_valid
+    return issue_seconds, verify_seconds
+
+
+def bench_database():
+    """Benchmark issue/verify round trips; all rows are rolled back."""
+    print(f"\nDatabase ({settings.DATABASES['default']['ENGINE']})")
+    print("=" * 70)
+
+    class Rollback(Exception):
+        pass
+
+    # Keep log handler cost out of both paths
+    logging.disable(logging.CRITICAL)
+    try:
+        with atomic_all_databases():
+            user = User.objects.create_user('bench-otp', 'bench-otp@example.com', 'bench-password')
+
+            issue_seconds, verify_seconds = time_issue_verify(
+                user, legacy_issue, legacy_verify, lambda otp_log: otp_log.otp_hash)
+            report("legacy issue (plaintext)", issue_seconds, DB_ITERATIONS)
+            report("legacy verify (SQL match, 2 saves)", verify_seconds, DB_ITERATIONS)
+
+            issue_seconds, verify_seconds = time_issue_verify(
+                user, OTPLog.generate_otp, verify_otp, lambda otp_log: otp_log.otp_code)
+            report("issue (generate_otp)", issue_seconds, DB_ITERATIONS)
+            report("verify (verify_otp)", verify_seconds, DB_ITERATIONS)
+            raise Rollback
+    except Rollback:
+        pass
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def main():
+    bench_in_process()
+    if '--db' in sys.argv:
+        bench_database()
+
+
+if __name__ == '__main__':
+    main()
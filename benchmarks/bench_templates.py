@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Template render benchmark for 2FA Email Login System.
+Compares per-template render time with and without the cached template loader.
+
+Usage:
+    python benchmarks/bench_templates.py
+"""
+
+import os
+import sys
+import timeit
+import django
+from pathlib import Path
+
+# Add the project directory to Python path
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.template.backends.django import DjangoTemplates
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.utils import timezone
+from authentication.forms import LoginForm, OTPVerificationForm, UserRegistrationForm
+from authentication.models import SecuritySummary, current_week_start
+
+ITERATIONS = 500
+
+
+def build_uncached_backend():
+    """Build a template backend that re-reads and re-parses on every lookup."""
+    config = settings.TEMPLATES[0]
+    options = dict(config['OPTIONS'])
+    options['loaders'] = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    return DjangoTemplates({
+        'NAME': 'uncached',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': options,
+    })
+
+
+def build_contexts():
+    """Return representative render contexts keyed by template name."""
+    user = User(pk=1, username='bench', email='bench@example.com')
+    now = timezone.now()
+    summary = SecuritySummary(
+        user=user, last_login_at=now, previous_login_at=now - timezone.timedelta(days=1),
+        failed_attempts=0, failed_attempts_before_last_login=2, otps_this_week=3,
+        week_start=current_week_start(), updated_at=now,
+    )
+    return {
+        'authentication/login.html': {'form': LoginForm()},
+        'authentication/register.html': {'form': UserRegistrationForm()},
+        'authentication/verify_otp.html': {'form': OTPVerificationForm(), 'email': user.email},
+        'authentication/dashboard.html': {'user': user, 'summary': summary},
+        'emails/otp_email.html': {'user': user, 'otp_code': '123456', 'expiry_minutes': 2,
+                                  'site_name': '2FA Login System'},
+        'emails/otp_email.txt': {'user': user, 'otp_code': '123456', 'expiry_minutes': 2,
+                                 'site_name': '2FA Login System'},
+    }
+
+
+def main():
+    request = RequestFactory().get('/')
+    request.user = User(username='bench', email='bench@example.com')
+    uncached = build_uncached_backend()
+
+    print(f"{'template':<34} {'uncached':>12} {'cached':>12} {'speedup':>8}")
+    print("=" * 70)
+    for name, context in build_contexts().items():
+        # Prime the cached loader, as the worker warm-up does
+        get_template(name)
+        cold = timeit.timeit(lambda: uncached.get_template(name).render(context, request), number=ITERATIONS)
+        warm = timeit.timeit(lambda: get_template(name).render(context, request), number=ITERATIONS)
+        cold_us = cold / ITERATIONS * 1e6
+        warm_us = warm / ITERATIONS * 1e6
+        print(f"{name:<34} {cold_us:9.1f} us {warm_us:9.1f} us {cold / warm:7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
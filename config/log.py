@@ -0,0 +1,148 @@
+"""
+Logging pipeline for 2fa_email_login project.
+
+Records are handed to a background thread through a queue so that JSON
+formatting and handler I/O happen off request threads. Each record is tagged
+with the current request id and view name by RequestLogMiddleware.
+"""
+
+import json
+import logging
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueListener
+from queue import SimpleQueue
+
+request_id_var = ContextVar('request_id', default=None)
+view_name_var = ContextVar('view_name', default=None)
+
+logger = logging.getLogger('request')
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Attach the current request id and view name to every record.
+    """
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        record.view_name = view_name_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of records at ``level``.
+
+    Attach to a logger to thin out high-volume warnings (e.g. failed OTP
+    guesses); records at other levels always pass.
+    """
+
+    def __init__(self, rate=1.0, level='WARNING'):
+        super().__init__()
+        self.rate = float(rate)
+        self.levelno = logging.getLevelName(level) if isinstance(level, str) else level
+
+    def filter(self, record):
+        if record.levelno != self.levelno:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as single-line JSON objects.
+    """
+
+    def format(self, record):
+        entry = {
+            'timestamp': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'view_name': getattr(record, 'view_name', None),
+        }
+        for field in ('latency_ms', 'status_code', 'method', 'path'):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class QueueStreamHandler(logging.Handler):
+    """
+    Queue records for a background thread that formats and writes them.
+
+    The formatter configured for this handler is applied by the listener
+    thread, so request threads only pay for the filters and an enqueue.
+
+    This is deliberately not a QueueHandler subclass: on Python 3.12+
+    dictConfig() builds those itself and replaces their listener.
+    """
+
+    def __init__(self, queue=None, stream=None):
+        super().__init__()
+        self.queue = queue if queue is not None else SimpleQueue()
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def handle(self, record):
+        # The queue is thread-safe, so skip the handler lock that
+        # Handler.handle() takes around emit().
+        rv = self.filter(record)
+        if rv:
+            self.emit(rv if isinstance(rv, logging.LogRecord) else record)
+        return rv
+
+    def emit(self, record):
+        # The queue stays in-process, so the record is passed through as-is
+        # and message formatting is deferred to the listener thread.
+        self.queue.put_nowait(record)
+
+    def close(self):
+        # Called by logging.shutdown() at exit; drains queued records first
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+class RequestLogMiddleware:
+    """
+    Assign a request id, record the resolved view name and log request latency.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex
+        request_token = request_id_var.set(request_id)
+        view_token = view_name_var.set(None)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            logger.info('%s %s', request.method, request.path, extra={
+                'latency_ms': round((time.perf_counter() - start) * 1000, 2),
+                'status_code': response.status_code,
+            })
+            response['X-Request-ID'] = request_id
+            return response
+        finally:
+            request_id_var.reset(request_token)
+            view_name_var.reset(view_token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.resolver_match:
+            view_name_var.set(request.resolver_match.view_name)
+        return None
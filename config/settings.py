@@ -37,7 +37,11 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'config.log.RequestLogMiddleware',
+    'authentication.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -52,8 +56,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Parsed templates are kept in memory; in DEBUG the autoreloader
+            # clears them when a template changes on disk
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -66,6 +77,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Compile every project template when a worker boots so the first requests
+# don't pay for template parsing
+TEMPLATE_WARMUP = os.getenv('TEMPLATE_WARMUP', str(not DEBUG)).lower() == 'true'
+
 # Database
 DATABASES = {
     'default': {
@@ -78,6 +93,20 @@ DATABASES = {
     }
 }
 
+# OTP and audit tables (OTPLog, LoginAttempt) are sharded by user across these
+# aliases (see authentication/sharding.py). Aliases other than 'default' are
+# configured from DB_<ALIAS>_* variables, falling back to the default values.
+# Changing the list remaps users to shards; existing rows are not moved.
+AUDIT_SHARDS = [alias.strip() for alias in os.getenv('AUDIT_SHARDS', 'default').split(',') if alias.strip()]
+for alias in AUDIT_SHARDS:
+    if alias not in DATABASES:
+        DATABASES[alias] = {
+            key: os.getenv(f'DB_{alias.upper()}_{key}', value)
+            for key, value in DATABASES['default'].items()
+        }
+
+DATABASE_ROUTERS = ['authentication.routers.AuditShardRouter']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -107,6 +136,40 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Hashed filenames with pre-built gzip/brotli variants, served by WhiteNoise
+# with far-future immutable cache headers
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Cache
+REDIS_URL = os.getenv('REDIS_URL', '')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Per-process cache for rendered template fragments
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+    },
+}
+if REDIS_URL:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+
+# Dashboard security summaries are cached and invalidated on change. The
+# invalidation only reaches other workers through a shared cache, so with the
+# per-process fallback a summary is only kept briefly.
+SECURITY_SUMMARY_CACHE_SECONDS = 300 if REDIS_URL else 5
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -127,6 +190,72 @@ DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@2fa-login.com')
 # OTP Configuration
 OTP_LENGTH = 6
 OTP_EXPIRY_MINUTES = 2
+OTP_HMAC_KEY = os.getenv('OTP_HMAC_KEY', SECRET_KEY)
+# Repeated logins within this window share the OTP already sent
+OTP_ISSUE_WINDOW_SECONDS = 10
+# Upper bound on how long an in-flight issuance (including SMTP) holds the lock
+OTP_ISSUE_LOCK_SECONDS = 30
+
+# Trusted devices ("remember this device")
+TRUSTED_DEVICE_COOKIE_NAME = 'trusted_device'
+TRUSTED_DEVICE_DAYS = 30
+
+# Logging
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+# Fraction of high-volume warnings (e.g. failed OTP guesses) that are kept
+LOG_OTP_WARNING_SAMPLE_RATE = float(os.getenv('LOG_OTP_WARNING_SAMPLE_RATE', '0.1'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_context': {
+            '()': 'config.log.RequestContextFilter',
+        },
+        'otp_warning_sampling': {
+            '()': 'config.log.SamplingFilter',
+            'rate': LOG_OTP_WARNING_SAMPLE_RATE,
+        },
+    },
+    'formatters': {
+        'json': {
+            '()': 'config.log.JsonFormatter',
+        },
+    },
+    'handlers': {
+        'queue': {
+            'class': 'config.log.QueueStreamHandler',
+            'formatter': 'json',
+            'filters': ['request_context'],
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'authentication.email_otp': {
+            'filters': ['otp_warning_sampling'],
+        },
+    },
+}
+
+# Request profiling (off by default; see authentication/profiling.py)
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+# Fraction of requests profiled without the header
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+# Requests carrying a signed token (manage.py profiling_token) in this header are profiled
+PROFILING_HEADER = 'X-Profile'
+PROFILING_TOKEN_MAX_AGE = 24 * 60 * 60
+# 'cprofile' writes .prof files, 'sample' writes folded stacks for flamegraphs
+PROFILING_MODE = os.getenv('PROFILING_MODE', 'cprofile')
+PROFILING_SAMPLE_INTERVAL = 0.001
+PROFILING_DIR = os.getenv('PROFILING_DIR', str(BASE_DIR / 'profiles'))
 
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
@@ -9,3 +9,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Each Gunicorn worker imports this module at boot, so templates are compiled
+# once per worker before it accepts requests
+from django.conf import settings  # noqa: E402
+
+if settings.TEMPLATE_WARMUP:
+    from authentication.template_cache import warm_template_cache  # noqa: E402
+    warm_template_cache()
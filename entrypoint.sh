@@ -8,9 +8,15 @@ until pg_isready -h "${DB_HOST:-db}" -p "${DB_PORT:-5432}" -U "${DB_USER:-postgr
 done
 echo "Postgres is ready."
 
-# Create and apply migrations, then collect static files (idempotent)
-python manage.py makemigrations authentication || true
+# Apply migrations to 'default', then to every other audit shard
 python manage.py migrate --noinput
+for alias in $(echo "${AUDIT_SHARDS:-default}" | tr ',' ' '); do
+  if [ "$alias" != "default" ]; then
+    python manage.py migrate --noinput --database "$alias"
+  fi
+done
+
+# Collect static files (idempotent)
 python manage.py collectstatic --noinput
 
 # Start Gunicorn
@@ -87,7 +87,6 @@ sleep 10
 
 # Run Django migrations
 print_info "Running Django migrations..."
-python manage.py makemigrations
 python manage.py migrate
 print_status "Database migrations completed"
 